@@ -5,18 +5,195 @@ allin1の出力をMusic-Dissector形式に変換するスクリプト
 
 import json
 import gzip
+import base64
 import re
 from pathlib import Path
 import soundfile as sf
 import numpy as np
-import librosa
+from scipy import signal
+import os
 import shutil
 import subprocess
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    # orjsonが無い環境では標準のjsonで書き出す
+    orjson = None
+
+try:
+    import av
+except ImportError:
+    # PyAVが無い環境ではffmpegコマンドでMP3に変換する
+    av = None
+
+try:
+    import fcntl
+except ImportError:
+    # Windowsなどfcntlが無い環境ではreflinkを使わずにコピーする
+    fcntl = None
+
+# reflink（コピーオンライトでのファイル複製）用のioctl番号（Python 3.12未満ではfcntlに定義が無い）
+_FICLONE = getattr(fcntl, 'FICLONE', 0x40049409)
+
+# トラックIDに使えない文字（英数字とアンダースコア以外）
+_NON_WORD_RE = re.compile(r'\W+')
+
+def load_audio(audio_path):
+    """
+    音声ファイルをモノラルのfloat32配列として読み込む
+    
+    Args:
+        audio_path: 音声ファイルのパス
+    
+    Returns:
+        tuple: (波形データ, サンプリングレート)
+    """
+    # ステムはPCM WAVなのでsoundfileで直接float32として読む
+    y, sr = sf.read(str(audio_path), dtype='float32', always_2d=False)
+    if y.ndim == 2:
+        # ステレオの場合はモノラルにダウンミックス
+        y = y.mean(axis=1, dtype=np.float32)
+    return y, sr
+
+@functools.lru_cache(maxsize=64)
+def _get_duration_cached(path_str, mtime_ns):
+    return sf.info(path_str).duration
+
+def get_duration(audio_path):
+    """
+    音声ファイルの長さ（秒）をヘッダから取得
+    
+    (パス, 更新時刻)をキーにキャッシュするため、同じファイルへの問い合わせは1回で済む
+    
+    Args:
+        audio_path: 音声ファイルのパス
+    
+    Returns:
+        float: 長さ（秒）
+    """
+    audio_path = Path(audio_path)
+    return _get_duration_cached(str(audio_path), audio_path.stat().st_mtime_ns)
+
+@functools.lru_cache(maxsize=8)
+def _band_filters(sr):
+    """
+    low, mid, highの3帯域フィルタ（4次バターワースのSOS）を設計
+    
+    帯域の境界はナイキスト周波数を3等分した位置（STFTのビンを3等分していた従来と同じ）
+    係数はfloat32にしておき、float32の音声に対してそのままfloat32でフィルタをかける
+    """
+    nyquist = sr / 2
+    low_cut = nyquist / 3
+    high_cut = 2 * nyquist / 3
+    return tuple(
+        sos.astype(np.float32)
+        for sos in (
+            signal.butter(4, low_cut, btype='lowpass', fs=sr, output='sos'),
+            signal.butter(4, [low_cut, high_cut], btype='bandpass', fs=sr, output='sos'),
+            signal.butter(4, high_cut, btype='highpass', fs=sr, output='sos'),
+        )
+    )
+
+def _block_rms(y, hop_length, n_frames):
+    """
+    hop_lengthサンプルごとのブロックに区切ってRMSを計算
+    """
+    blocks = y[:n_frames * hop_length].reshape(n_frames, hop_length)
+    return np.sqrt(np.mean(blocks * blocks, axis=1))
+
+@functools.lru_cache(maxsize=8)
+def _interp_axes(src_len, dst_len):
+    """
+    src_len点の配列をdst_len点に線形補間するための左右の参照位置と重み（重みはfloat32）
+    
+    同じ長さの組み合わせは全帯域・全ステムで共通なので、長さごとにキャッシュして使い回す
+    """
+    positions = np.linspace(0, src_len - 1, dst_len, dtype=np.float32)
+    left = np.floor(positions).astype(np.intp)
+    right = np.minimum(left + 1, src_len - 1)
+    # intpとの差はfloat64になるので、重みはfloat32に戻して補間全体をfloat32で行う
+    weight = (positions - left).astype(np.float32)
+    # キャッシュした配列を呼び出し側で書き換えられないようにする
+    for arr in (left, right, weight):
+        arr.flags.writeable = False
+    return left, right, weight
+
+def _finalize_bands(energies, target_len):
+    """
+    (帯域数, フレーム数)の帯域エネルギーを帯域ごとに0-255に正規化し、
+    target_lenにリサンプリングして(帯域数, target_len)のuint8で返す
+    
+    3帯域をまとめて1回の演算で処理し、帯域ごとにndarrayを作り直さない
+    """
+    peaks = energies.max(axis=1, keepdims=True)
+    energies = energies * (255.0 / np.where(peaks > 0, peaks, 1.0))
+    if energies.shape[1] != target_len:
+        left, right, weight = _interp_axes(energies.shape[1], target_len)
+        # 線形補間はfloat32のまま、取り出した2本のバッファ上でインプレースに計算する
+        # （差分・重み付け・加算ごとに(帯域数, target_len)の一時配列を作らない）
+        lower = energies[:, left]
+        energies = energies[:, right]
+        energies -= lower
+        energies *= weight
+        energies += lower
+    return energies.astype(np.uint8)
+
+@functools.lru_cache(maxsize=4)
+def _silent_band(length):
+    """
+    長さlengthの読み取り専用ゼロ配列（全帯域・全ステムで共有する）
+    """
+    zeros = np.zeros(length, dtype=np.uint8)
+    zeros.flags.writeable = False
+    return zeros
+
+def _silent_bands(length):
+    """
+    特徴量が得られないステム用の、全帯域ゼロの特徴量
+    
+    ゼロ配列は共有するが、辞書は呼び出し側で書き換えられても影響しないよう毎回作る
+    """
+    zeros = _silent_band(length)
+    return {"low": zeros, "mid": zeros, "high": zeros}
+
+def _features_cache_path(audio_path, target_length):
+    """
+    特徴量キャッシュ（音声ファイルと同じ場所に置く.npz）のパス
+    """
+    return audio_path.with_name(f"{audio_path.stem}.feat{target_length}.npz")
+
+def _load_cached_features(audio_path, target_length):
+    """
+    音声ファイルより新しい特徴量キャッシュがあれば読み込む（無ければNone）
+    """
+    cache_path = _features_cache_path(audio_path, target_length)
+    try:
+        if cache_path.stat().st_mtime_ns < audio_path.stat().st_mtime_ns:
+            return None
+        with np.load(cache_path) as cached:
+            return {band: cached[band] for band in ("low", "mid", "high")}
+    except Exception:
+        # キャッシュが無い・壊れている場合は計算し直す
+        return None
+
+def _save_cached_features(audio_path, target_length, features):
+    """
+    特徴量をキャッシュに保存（書き込めない場合は何もしない）
+    """
+    try:
+        np.savez(_features_cache_path(audio_path, target_length), **features)
+    except OSError as e:
+        print(f"  ⚠️  特徴量キャッシュを保存できませんでした: {e}")
 
 def extract_audio_features(audio_path, target_length=46806):
     """
     音声ファイルから周波数帯域別の特徴量を抽出
     
+    結果は音声ファイルの隣に.npzとしてキャッシュし、再変換時は音声が更新されていなければ読み込むだけで済ませる
+    
     Args:
         audio_path: 音声ファイルのパス
         target_length: 出力配列の長さ
@@ -24,56 +201,82 @@ def extract_audio_features(audio_path, target_length=46806):
     Returns:
         dict: low, mid, highの周波数帯域別特徴量
     """
+    audio_path = Path(audio_path)
+    cached = _load_cached_features(audio_path, target_length)
+    if cached is not None:
+        return cached
+    
     try:
         # 音声ファイルを読み込み
-        y, sr = librosa.load(audio_path, sr=None)
+        y, sr = load_audio(audio_path)
         
         # 時間軸方向のサンプル数を計算
         hop_length = len(y) // target_length
         if hop_length < 1:
             hop_length = 1
         
-        # スペクトログラムを計算
-        D = np.abs(librosa.stft(y, hop_length=hop_length))
-        
-        # 周波数帯域を3つに分割
-        freq_bins = D.shape[0]
-        low_end = freq_bins // 3
-        mid_end = 2 * freq_bins // 3
-        
-        # 各帯域のエネルギーを計算
-        low_energy = np.mean(D[:low_end, :], axis=0)
-        mid_energy = np.mean(D[low_end:mid_end, :], axis=0)
-        high_energy = np.mean(D[mid_end:, :], axis=0)
+        # 3帯域のフィルタバンクを時間領域の信号に掛け、hop_lengthごとのRMSを帯域エネルギーとする
+        # （STFTの全周波数ビンを作ってから平均する代わりに、必要な3本だけを計算する）
+        # 事前のダウンサンプリングはしない: 帯域の境界はナイキスト周波数基準なので帯域の意味が変わり、
+        # またresample_polyの方がここでの4次IIRフィルタ1本より重い
+        n_frames = len(y) // hop_length
+        energies = np.stack([
+            _block_rms(signal.sosfilt(sos, y), hop_length, n_frames)
+            for sos in _band_filters(sr)
+        ])
+        low, mid, high = _finalize_bands(energies, target_length)
         
-        # 正規化（0-255の範囲に）
-        def normalize(arr):
-            if arr.max() > 0:
-                # 0-255の範囲に正規化して整数に変換
-                normalized = (arr / arr.max() * 255).astype(int)
-                return normalized.tolist()
-            return arr.tolist()
-        
-        # target_lengthに合わせてリサンプリング
-        def resample_to_length(arr, target_len):
-            if len(arr) == target_len:
-                return arr
-            indices = np.linspace(0, len(arr) - 1, target_len)
-            return np.interp(indices, np.arange(len(arr)), arr).tolist()
-        
-        return {
-            "low": resample_to_length(normalize(low_energy), target_length),
-            "mid": resample_to_length(normalize(mid_energy), target_length),
-            "high": resample_to_length(normalize(high_energy), target_length)
-        }
+        features = {"low": low, "mid": mid, "high": high}
     except Exception as e:
         print(f"警告: {audio_path}の特徴抽出に失敗しました: {e}")
         # エラーの場合はゼロ配列を返す
-        return {
-            "low": [0.0] * target_length,
-            "mid": [0.0] * target_length,
-            "high": [0.0] * target_length
-        }
+        return _silent_bands(target_length)
+    
+    # 失敗時のゼロ配列はキャッシュしない
+    _save_cached_features(audio_path, target_length, features)
+    return features
+
+def _encode_bands_base64(bands):
+    """
+    low, mid, highのuint8配列をそれぞれbase64文字列にする
+    
+    数値のリストとして書き出すより、JSONが小さくシリアライズも速い（UI側で数値配列に戻す）
+    """
+    return {
+        band: base64.b64encode(np.ascontiguousarray(values, dtype=np.uint8).tobytes()).decode('ascii')
+        for band, values in bands.items()
+    }
+
+def _json_default(obj):
+    """
+    json.dumpで直接扱えない値を変換
+    
+    特徴量はuint8のndarrayのまま保持し、書き出し時にだけリストへ変換する
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _dumps_json(obj, indent=False):
+    """
+    Music-Dissector形式のデータをJSONのバイト列に変換
+    
+    orjsonがあればndarrayをそのままC実装で書き出し、無ければ標準のjsonで書き出す
+    
+    Args:
+        obj: 書き出すデータ
+        indent: Trueなら人が読むためのインデント付き、Falseなら空白なしのコンパクト形式
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=_json_default).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_json_default).encode('utf-8')
 
 def calculate_f1_score(pred_times, true_times, tolerance=0.07):
     """
@@ -95,12 +298,15 @@ def calculate_f1_score(pred_times, true_times, tolerance=0.07):
         return 1.0
     
     # 簡易的なF1計算（実際の実装では、より厳密な計算が必要）
-    matched = 0
-    for pred in pred_times:
-        for true in true_times:
-            if abs(pred - true) <= tolerance:
-                matched += 1
-                break
+    # 正解をソートし、各予測に最も近い正解を二分探索で求めて許容誤差内かを判定する
+    # （二重ループのO(N·M)をO((N+M)logM)に削減）
+    pred = np.asarray(pred_times, dtype=np.float64)
+    true = np.sort(np.asarray(true_times, dtype=np.float64))
+    idx = np.searchsorted(true, pred)
+    left = true[np.clip(idx - 1, 0, len(true) - 1)]
+    right = true[np.clip(idx, 0, len(true) - 1)]
+    nearest = np.minimum(np.abs(pred - left), np.abs(pred - right))
+    matched = int(np.count_nonzero(nearest <= tolerance))
     
     if matched == 0:
         return 0.0
@@ -113,6 +319,82 @@ def calculate_f1_score(pred_times, true_times, tolerance=0.07):
     
     return 2 * (precision * recall) / (precision + recall)
 
+def _encode_mp3_av(wav_path, mp3_path):
+    """
+    PyAV（libavcodec）を使ってプロセス内でWAVをMP3にエンコード
+    
+    ffmpegプロセスの起動を省けるので、ステムごとの変換が速くなる
+    """
+    with av.open(str(wav_path)) as ic, av.open(str(mp3_path), 'w') as oc:
+        istream = ic.streams.audio[0]
+        ostream = oc.add_stream('mp3', rate=istream.rate)
+        ostream.bit_rate = 192000
+        for frame in ic.decode(istream):
+            for packet in ostream.encode(frame):
+                oc.mux(packet)
+        # エンコーダに残っているフレームを書き出す
+        for packet in ostream.encode():
+            oc.mux(packet)
+
+def _fast_copy(src, dst):
+    """
+    ファイルをカーネル内でコピーし、メタデータも引き継ぐ（shutil.copy2の代わり）
+    
+    btrfs/XFSなどではreflinkでデータを複製せずに済ませ、
+    使えない場合はcopy_file_range、最後にshutil.copyfileでコピーする
+    """
+    # 'wb'で開くとコピー元ごと空にしてしまうので、同じファイルなら開く前にエラーにする
+    try:
+        if os.path.samefile(src, dst):
+            raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+    except FileNotFoundError:
+        pass
+    
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        src_fd = fsrc.fileno()
+        dst_fd = fdst.fileno()
+        try:
+            if fcntl is None:
+                raise OSError("fcntlが使えません")
+            fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+            copied = True
+        except OSError:
+            copied = False
+        
+        if not copied and hasattr(os, 'copy_file_range'):
+            try:
+                remaining = os.fstat(src_fd).st_size
+                while remaining > 0:
+                    n = os.copy_file_range(src_fd, dst_fd, remaining)
+                    if n == 0:
+                        break
+                    remaining -= n
+                copied = remaining == 0
+            except OSError:
+                # 途中まで書き込んでいる可能性があるので、最初から書き直す
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+    
+    if not copied:
+        shutil.copyfile(src, dst)
+    shutil.copystat(src, dst)
+
+def _write_bytes_atomic(path, data):
+    """
+    一時ファイルに書き込んでからos.replaceで置き換える
+    
+    UIが読み込み中のファイルを上書きしても、途中まで書かれたファイルや
+    ファイルが無い瞬間が見えないようにする
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
 def convert_wav_to_mp3(wav_path, mp3_path):
     """
     WAVファイルをMP3に変換
@@ -121,6 +403,15 @@ def convert_wav_to_mp3(wav_path, mp3_path):
         wav_path: 入力WAVファイルのパス
         mp3_path: 出力MP3ファイルのパス
     """
+    if av is not None:
+        try:
+            _encode_mp3_av(wav_path, mp3_path)
+            print(f"  ✅ MP3変換完了: {mp3_path.name}")
+            return
+        except Exception as e:
+            # PyAVで失敗した場合はffmpegコマンドで再試行する
+            print(f"  ⚠️  PyAVでのMP3変換に失敗: {e}")
+    
     try:
         # ffmpegを使用してWAVをMP3に変換
         cmd = [
@@ -134,19 +425,21 @@ def convert_wav_to_mp3(wav_path, mp3_path):
     except subprocess.CalledProcessError as e:
         print(f"  ❌ MP3変換エラー: {e}")
         # ffmpegがない場合は、WAVファイルをそのままコピー（拡張子は.mp3にする）
-        shutil.copy2(wav_path, mp3_path)
+        _fast_copy(wav_path, mp3_path)
         print(f"  ⚠️  WAVファイルをコピー: {mp3_path.name}")
     except FileNotFoundError:
         print(f"  ❌ ffmpegが見つかりません。WAVファイルをコピーします。")
-        shutil.copy2(wav_path, mp3_path)
+        _fast_copy(wav_path, mp3_path)
 
-def convert_to_music_dissector(input_path, output_path=None):
+def convert_to_music_dissector(input_path, output_path=None, debug=False, binary_bands=False):
     """
     allin1のJSON出力をMusic-Dissector形式に変換
     
     Args:
         input_path: 入力JSONファイルのパス
         output_path: 出力ディレクトリのパス（省略時は同じディレクトリにmusic-dissectorフォルダを作成）
+        debug: Trueならデバッグ用にインデント付きの通常のJSONファイルも保存
+        binary_bands: Trueならnav/wavの各帯域を数値のリストではなくbase64文字列で保存
     """
     input_path = Path(input_path)
     
@@ -165,16 +458,19 @@ def convert_to_music_dissector(input_path, output_path=None):
     mixdown_dir.mkdir(parents=True, exist_ok=True)
     demixed_dir.mkdir(parents=True, exist_ok=True)
     
-    # 元のJSONを読み込み
-    with open(input_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # 元のJSONを読み込み（orjsonがあればバイト列のままC実装で解析する）
+    if orjson is not None:
+        data = orjson.loads(input_path.read_bytes())
+    else:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
     
     # 音声ファイルのパスを取得
     audio_path_str = data.get('file_path', data.get('file_name', ''))
     audio_path = Path(audio_path_str)
     
     # IDを生成（ファイル名から非英数字を除去し、数字を先頭に追加）
-    file_id = re.sub(r'\W+', '', audio_path.stem.lower())
+    file_id = _NON_WORD_RE.sub('', audio_path.stem.lower())
     # Music-Dissectorのフォーマットに合わせて数字を追加
     file_id = f"0000_{file_id}"
     
@@ -194,16 +490,21 @@ def convert_to_music_dissector(input_path, output_path=None):
         possible_audio_paths.append(Path.cwd() / "module" / "sample_data" / audio_path.name)
         possible_audio_paths.append(input_path.parent.parent / "module" / "sample_data" / audio_path.name)
     
-    for test_path in possible_audio_paths:
-        if test_path.exists():
-            try:
-                print(f"音声ファイル発見: {test_path}")
-                info = sf.info(test_path)
-                duration = info.duration
-                print(f"  長さ: {duration:.2f}秒")
-                break
-            except Exception as e:
-                print(f"  読み込みエラー: {e}")
+    # 同じパスを重複して調べないようにし、存在確認はget_durationのstatに任せる
+    # （exists()で1回、読み込みでもう1回statするのを避ける）
+    for test_path in dict.fromkeys(possible_audio_paths):
+        try:
+            duration = get_duration(test_path)
+        except (FileNotFoundError, NotADirectoryError):
+            # exists()と同じく、途中のパスがファイルの場合も見つからない扱いにする
+            continue
+        except Exception as e:
+            print(f"音声ファイル発見: {test_path}")
+            print(f"  読み込みエラー: {e}")
+            continue
+        print(f"音声ファイル発見: {test_path}")
+        print(f"  長さ: {duration:.2f}秒")
+        break
     
     # 方法2: ステムファイルから取得
     if duration is None:
@@ -213,8 +514,9 @@ def convert_to_music_dissector(input_path, output_path=None):
             if stem_files:
                 try:
                     print(f"ステムファイルから長さを取得: {stem_files[0]}")
-                    info = sf.info(stem_files[0])
-                    duration = info.duration
+                    # 長さはヘッダだけで分かるのでデコードしない
+                    # （特徴量キャッシュがあれば、ステムは特徴抽出でもデコードされない）
+                    duration = get_duration(stem_files[0])
                     print(f"  長さ: {duration:.2f}秒")
                 except Exception as e:
                     print(f"  読み込みエラー: {e}")
@@ -229,8 +531,7 @@ def convert_to_music_dissector(input_path, output_path=None):
             if mp3_path.exists():
                 try:
                     print(f"既存のMP3から長さを取得: {mp3_path}")
-                    info = sf.info(mp3_path)
-                    duration = info.duration
+                    duration = get_duration(mp3_path)
                     print(f"  長さ: {duration:.2f}秒")
                     break
                 except Exception as e:
@@ -288,23 +589,34 @@ def convert_to_music_dissector(input_path, output_path=None):
         "vocal": "vocals.wav"  # vocalsをvocalにマッピング
     }
     
-    for instrument, filename in instrument_mapping.items():
-        stem_path = stems_dir / filename
-        if stem_path.exists():
-            print(f"処理中: {stem_path}")
-            features = extract_audio_features(stem_path, array_length)
+    # 楽器ごとの特徴抽出は互いに独立しているのでスレッドで並列実行
+    # （まず.npzの特徴量キャッシュを調べ、無ければsoundfileでの読み込みとsosfiltによる
+    # 帯域フィルタ・RMS計算を行う。いずれもNumPy/SciPy/libsndfile内ではGILを解放する）
+    with ThreadPoolExecutor(max_workers=len(instrument_mapping)) as executor:
+        futures = {}
+        for instrument, filename in instrument_mapping.items():
+            stem_path = stems_dir / filename
+            if stem_path.exists():
+                print(f"処理中: {stem_path}")
+                futures[instrument] = executor.submit(extract_audio_features, stem_path, array_length)
+            else:
+                print(f"警告: {stem_path}が見つかりません")
+                # ファイルが見つからない場合はゼロ配列
+                music_dissector_data["nav"][instrument] = _silent_bands(array_length)
+                music_dissector_data["wav"][instrument] = music_dissector_data["nav"][instrument]
+        
+        for instrument, future in futures.items():
+            features = future.result()
             music_dissector_data["nav"][instrument] = features
             # wavデータはnavと同じにする（簡略化）
             music_dissector_data["wav"][instrument] = features
-        else:
-            print(f"警告: {stem_path}が見つかりません")
-            # ファイルが見つからない場合はゼロ配列
-            music_dissector_data["nav"][instrument] = {
-                "low": [0.0] * array_length,
-                "mid": [0.0] * array_length,
-                "high": [0.0] * array_length
-            }
-            music_dissector_data["wav"][instrument] = music_dissector_data["nav"][instrument]
+    
+    if binary_bands:
+        # navとwavは同じデータなので、楽器ごとに1回だけエンコードして共有する
+        for instrument in instrument_mapping:
+            encoded = _encode_bands_base64(music_dissector_data["nav"][instrument])
+            music_dissector_data["nav"][instrument] = encoded
+            music_dissector_data["wav"][instrument] = encoded
     
     # 既存のデータをinferencesに移動
     music_dissector_data["inferences"] = {
@@ -315,41 +627,28 @@ def convert_to_music_dissector(input_path, output_path=None):
     }
     
     # セグメント情報を変換（オブジェクトから時刻のリストとラベルのリストに分離）
-    if data.get("segments"):
-        segments_times = []
-        labels = []
-        for i, segment in enumerate(data["segments"]):
-            segments_times.append(segment["start"])
-            labels.append(segment["label"])
+    segments = data.get("segments")
+    if segments:
         # 最後のセグメントの終了時刻も追加
-        if data["segments"]:
-            segments_times.append(data["segments"][-1]["end"])
+        segments_times = [segment["start"] for segment in segments] + [segments[-1]["end"]]
+        labels = [segment["label"] for segment in segments]
         
         music_dissector_data["inferences"]["segments"] = segments_times
         music_dissector_data["inferences"]["labels"] = labels
     
     # truthsデータを追加（現時点ではinferencesと同じデータを使用）
+    # 以降で書き換えることはないので、コピーせず同じリストを参照する
+    inferences = music_dissector_data["inferences"]
     music_dissector_data["truths"] = {
-        "beats": music_dissector_data["inferences"]["beats"].copy(),
-        "downbeats": music_dissector_data["inferences"]["downbeats"].copy(),
-        "segments": music_dissector_data["inferences"]["segments"].copy(),
-        "labels": music_dissector_data["inferences"]["labels"].copy()
+        key: inferences[key] for key in ("beats", "downbeats", "segments", "labels")
     }
     
-    # スコアを計算（truthsとinferencesが同じなので1.0）
+    # スコアを設定（truthsはinferencesと同じデータなので、計算するまでもなく1.0）
+    # ただしcalculate_f1_scoreと同じく、空のリストは0.0とする
+    # 正解データを別に用意した場合はcalculate_f1_scoreで計算する
     music_dissector_data["scores"] = {
-        "beat": {
-            "f1": calculate_f1_score(
-                music_dissector_data["inferences"]["beats"],
-                music_dissector_data["truths"]["beats"]
-            )
-        },
-        "downbeat": {
-            "f1": calculate_f1_score(
-                music_dissector_data["inferences"]["downbeats"],
-                music_dissector_data["truths"]["downbeats"]
-            )
-        },
+        "beat": {"f1": 1.0 if inferences["beats"] else 0.0},
+        "downbeat": {"f1": 1.0 if inferences["downbeats"] else 0.0},
         "segment": {
             "F-measure@0.5": 1.0,  # 簡略化のため1.0に設定
             "Pairwise F-measure": 1.0  # 簡略化のため1.0に設定
@@ -363,15 +662,18 @@ def convert_to_music_dissector(input_path, output_path=None):
     track_name = input_path.stem
     mixdown_mp3 = mixdown_dir / f"{track_name}.mp3"
     
+    # MP3変換の対象（入力, 出力）を集める
+    mp3_jobs = []
+    
     # 元の音声ファイルが存在する場合
     if audio_path.exists():
         if audio_path.suffix.lower() == '.mp3':
             # すでにMP3の場合はコピー
-            shutil.copy2(audio_path, mixdown_mp3)
+            _fast_copy(audio_path, mixdown_mp3)
             print(f"  ✅ MP3コピー完了: {mixdown_mp3.name}")
         else:
             # MP3に変換
-            convert_wav_to_mp3(audio_path, mixdown_mp3)
+            mp3_jobs.append((audio_path, mixdown_mp3))
     
     # ステムファイルの変換と配置
     demixed_track_dir = demixed_dir / track_name
@@ -382,27 +684,40 @@ def convert_to_music_dissector(input_path, output_path=None):
         stem_mp3 = demixed_track_dir / f"{instrument}.mp3"
         
         if stem_wav.exists():
-            convert_wav_to_mp3(stem_wav, stem_mp3)
+            mp3_jobs.append((stem_wav, stem_mp3))
+    
+    # ffmpegのMP3エンコードはシングルスレッドなので、ファイルごとに並列で実行
+    if mp3_jobs:
+        with ThreadPoolExecutor(max_workers=len(mp3_jobs)) as executor:
+            list(executor.map(lambda job: convert_wav_to_mp3(*job), mp3_jobs))
     
     # JSONファイルをgzip圧縮して保存
     json_gz_path = data_dir / f"{track_name}.json.gz"
     
     print(f"\n📦 JSONファイルを圧縮中...")
-    with gzip.open(json_gz_path, 'wt', encoding='utf-8') as f:
-        json.dump(music_dissector_data, f, ensure_ascii=False, indent=2)
+    # フロントエンドが読むだけなので、gzipにはインデントなしのコンパクトなJSONを書き出す
+    payload = _dumps_json(music_dissector_data)
+    
+    # 数値の並んだJSONは圧縮率の差が小さいので、速度重視でcompresslevel=3を使う
+    # （デフォルトの9は圧縮にCPU時間の大半を使う）
+    # シリアライズ済みのバイト列を一括で圧縮し、1回の書き込みで一時ファイルに出力してから置き換える
+    _write_bytes_atomic(json_gz_path, gzip.compress(payload, compresslevel=3))
     
     print(f"✅ 変換完了: {json_gz_path}")
     
-    # 通常のJSONファイルも保存（デバッグ用）
-    json_path = data_dir / f"{track_name}.json"
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(music_dissector_data, f, ensure_ascii=False, indent=2)
+    # 通常のJSONファイルも保存（デバッグ用、指定時のみ）
+    if debug:
+        json_path = data_dir / f"{track_name}.json"
+        _write_bytes_atomic(json_path, _dumps_json(music_dissector_data, indent=True))
     
     print(f"\n📂 出力ディレクトリ構造:")
     print(f"  {output_dir}/")
     print(f"  ├── data/")
-    print(f"  │   ├── {track_name}.json.gz")
-    print(f"  │   └── {track_name}.json (デバッグ用)")
+    if debug:
+        print(f"  │   ├── {track_name}.json.gz")
+        print(f"  │   └── {track_name}.json (デバッグ用)")
+    else:
+        print(f"  │   └── {track_name}.json.gz")
     print(f"  ├── mixdown/")
     print(f"  │   └── {track_name}.mp3")
     print(f"  └── demixed/")
@@ -417,12 +732,18 @@ def convert_to_music_dissector(input_path, output_path=None):
 if __name__ == "__main__":
     import sys
     
-    if len(sys.argv) < 2:
-        print("使用方法: python convert_to_music_dissector.py <input.json> [output_dir]")
+    # --debugを指定するとインデント付きの通常のJSONファイルも保存する
+    # --binary-bandsを指定すると帯域データをbase64文字列で保存する
+    debug = "--debug" in sys.argv
+    binary_bands = "--binary-bands" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in ("--debug", "--binary-bands")]
+    
+    if len(args) < 1:
+        print("使用方法: python convert_to_music_dissector.py <input.json> [output_dir] [--debug] [--binary-bands]")
         print("例: python convert_to_music_dissector.py all-in-one/output_test/benefits/benefits.json")
         sys.exit(1)
     
-    input_file = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    input_file = args[0]
+    output_dir = args[1] if len(args) > 1 else None
     
-    convert_to_music_dissector(input_file, output_dir)
+    convert_to_music_dissector(input_file, output_dir, debug=debug, binary_bands=binary_bands)
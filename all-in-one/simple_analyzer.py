@@ -6,16 +6,30 @@ Music-Dissector形式への自動変換機能付き
 """
 
 import json
+import os
 import sys
+import errno
+import hashlib
+import mmap
+import pickle
+import shutil
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Optional, Dict, Union
+from types import SimpleNamespace
+from typing import Optional, Dict, Iterator, Union
 import logging
 
-# srcディレクトリをパスに追加
-sys.path.insert(0, str(Path(__file__).parent / "src"))
+try:
+    import orjson
+except ImportError:
+    # orjsonが無い環境では標準のjsonで読み書きする
+    orjson = None
 
-# ローカルのallin1をインポート
-from allin1 import analyze
+# srcディレクトリをパスに追加（allin1は_run_allin1で必要になった時点でインポートする）
+sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 # convert_to_music_dissectorをインポート（同じディレクトリから）
 from convert_to_music_dissector import convert_to_music_dissector
@@ -27,18 +41,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# SimpleAnalyzerのインスタンス内で覚えておく分析結果の件数
+MEMO_SIZE = 128
+
+# allin1（htdemucs）が出力するStem音声
+STEM_NAMES = ("bass", "drums", "other", "vocals")
+
+# allin1のマルチプロセス実行（スペクトログラム抽出のPoolなど）に起因する例外
+# （ワーカーの異常終了・引数をワーカーに渡せない場合）
+MULTIPROCESS_ERRORS = (BrokenProcessPool, pickle.PicklingError)
+
+# OSErrorのうち、ワーカープロセスの起動に失敗したとみなすもの
+# （ファイルディスクリプタの枯渇・メモリ不足）。それ以外のOSErrorはやり直さない
+MULTIPROCESS_ERRNOS = (errno.EMFILE, errno.ENOMEM)
+
 class SimpleAnalyzer:
     """シンプルな音楽分析クラス"""
     
-    def __init__(self, output_dir: str = "output"):
+    def __init__(self, output_dir: str = "output", device: str = "cpu", multiprocess: bool = True):
         """
         初期化
         
         Args:
             output_dir: 出力ディレクトリ（デフォルト: output）
+            device: allin1の実行デバイス（デフォルト: cpu。GPUがない環境でも動作）
+            multiprocess: allin1のスペクトログラム抽出などをマルチプロセスで行うか（デフォルト: True）
         """
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.device = device
+        self.multiprocess = multiprocess
+        # 音源分離の出力先（一時的）
+        self.temp_demix_dir = self.output_dir / "temp_demix"
+        # 音声ファイルの内容ハッシュをキーにした分析結果のキャッシュ
+        self.cache_dir = self.output_dir / ".analysis_cache"
+        # 出力ディレクトリはキャッシュ用と合わせてここで1回だけ作成し、ファイルごとには作らない
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # このインスタンスで分析済みの結果（(パス, 更新時刻, サイズ) -> 分析結果の辞書）
+        self._memo = OrderedDict()
     
     def analyze(self, audio_path: Union[str, Path]) -> Optional[Dict]:
         """
@@ -53,132 +92,511 @@ class SimpleAnalyzer:
         """
         audio_path = Path(audio_path)
         
-        if not audio_path.exists():
-            logger.error(f"❌ ファイルが見つかりません: {audio_path}")
+        # 存在確認はメモのキーを作るときのstatで兼ねる
+        try:
+            memo_key = self._memo_key(audio_path)
+        except OSError as e:
+            logger.error(f"❌ ファイルが見つかりません: {audio_path}（{e.strerror}）")
             return None
         
+        # このインスタンスで分析・出力済みのファイルはそのまま結果を返す
+        if memo_key in self._memo:
+            logger.info(f"♻️  分析済みです: {audio_path.name}")
+            self._memo.move_to_end(memo_key)
+            return self._memo[memo_key]
+        
         logger.info(f"🎵 分析開始: {audio_path.name}")
         
         try:
-            # 曲名ディレクトリを作成
-            track_dir = self.output_dir / audio_path.stem
-            track_dir.mkdir(parents=True, exist_ok=True)
-            
-            # 音源分離の出力先（一時的）
-            temp_demix_dir = self.output_dir / "temp_demix"
-            
-            # All-In-Oneで分析実行
-            result = analyze(
-                str(audio_path),
-                demix_dir=str(temp_demix_dir),
-                keep_byproducts=True,  # 音源分離ファイルを保持
-                device='cpu'  # GPUがない環境でも動作
-            )
+            # 同じ内容の音声を分析済みならキャッシュから出力する
+            digest = self._content_hash(audio_path)
+            cached = self._load_cache(digest)
+            if cached is not None:
+                analysis_data = self._save_cached_outputs(audio_path, cached)
+            else:
+                # All-In-Oneで分析実行
+                result = self._run_allin1(audio_path)
+                
+                analysis_data = self._save_outputs(audio_path, result)
+                self._store_cache(digest, audio_path, analysis_data)
             
-            # 分析結果を辞書形式に変換
-            analysis_data = {
-                "file_name": audio_path.name,
-                "file_path": str(audio_path.absolute()),
-                "bpm": result.bpm,
-                "beats": result.beats,
-                "downbeats": result.downbeats,
-                "beat_positions": result.beat_positions,
-                "segments": [
-                    {
-                        "start": seg.start,
-                        "end": seg.end,
-                        "label": seg.label
-                    }
-                    for seg in result.segments
-                ]
-            }
+            self._remember(memo_key, analysis_data)
+            return analysis_data
             
-            # JSONファイルとして保存
-            json_output_path = track_dir / f"{audio_path.stem}.json"
-            with open(json_output_path, 'w', encoding='utf-8') as f:
-                json.dump(analysis_data, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"❌ 分析エラー: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+    
+    @staticmethod
+    def _memo_key(audio_path: Path) -> tuple:
+        """
+        インスタンス内のメモのキー（ファイルが更新されたら別のキーになる）
+        """
+        st = audio_path.stat()
+        return (str(audio_path.resolve()), st.st_mtime_ns, st.st_size)
+    
+    def _remember(self, memo_key: tuple, analysis_data: Dict) -> None:
+        """
+        分析結果をメモに追加（MEMO_SIZE件を超えたら古いものから捨てる）
+        """
+        self._memo[memo_key] = analysis_data
+        self._memo.move_to_end(memo_key)
+        if len(self._memo) > MEMO_SIZE:
+            self._memo.popitem(last=False)
+    
+    @staticmethod
+    def _content_hash(audio_path: Path) -> str:
+        """
+        音声ファイルの内容ハッシュ（BLAKE2b）
+        
+        ファイルをmmapしてハッシュに直接渡し、Python側にファイル全体を読み込まない
+        """
+        hasher = hashlib.blake2b(digest_size=16)
+        with open(audio_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    hasher.update(mm)
+        return hasher.hexdigest()
+    
+    def _load_cache(self, digest: str) -> Optional[Dict]:
+        """
+        内容ハッシュに対応するキャッシュを読み込む
+        
+        Stem音声が残っていない場合は出力を再現できないのでNoneを返す
+        """
+        cache_path = self.cache_dir / f"{digest}.json"
+        try:
+            if orjson is not None:
+                cached = orjson.loads(cache_path.read_bytes())
+            else:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        # Stem音声が保存後に上書き（同名の別の音声を分析）されていたら、この分析結果とは合わない
+        stems_dir = Path(cached["stems_dir"])
+        try:
+            for stem in STEM_NAMES:
+                if self._stem_fingerprint(stems_dir / f"{stem}.wav") != cached["stems"][stem]:
+                    return None
+        except (OSError, KeyError):
+            return None
+        return cached
+    
+    @staticmethod
+    def _stem_fingerprint(stem_path: Path) -> list:
+        """
+        Stem音声が保存時のものから変わっていないかを確かめるための(サイズ, 更新時刻, inode)
+        """
+        st = stem_path.stat()
+        return [st.st_size, st.st_mtime_ns, st.st_ino]
+    
+    def _store_cache(self, digest: str, audio_path: Path, analysis_data: Dict) -> None:
+        """
+        分析結果とStem音声の場所・フィンガープリントを内容ハッシュをキーにして保存
+        """
+        stems_dir = (self.output_dir / audio_path.stem / "stems").absolute()
+        try:
+            cached = {
+                "analysis": {
+                    key: analysis_data[key]
+                    for key in ("bpm", "beats", "downbeats", "beat_positions", "segments")
+                },
+                "stems_dir": str(stems_dir),
+                "stems": {
+                    stem: self._stem_fingerprint(stems_dir / f"{stem}.wav")
+                    for stem in STEM_NAMES
+                }
+            }
+            cache_path = self.cache_dir / f"{digest}.json"
+            if orjson is not None:
+                cache_path.write_bytes(orjson.dumps(cached, option=orjson.OPT_SERIALIZE_NUMPY))
+            else:
+                with open(cache_path, 'w', encoding='utf-8') as f:
+                    json.dump(cached, f, ensure_ascii=False)
+        except (OSError, TypeError) as e:
+            # キャッシュを保存できなくても分析結果の出力には影響させない
+            logger.warning(f"⚠️  分析結果のキャッシュを保存できませんでした: {e}")
+    
+    def _save_cached_outputs(self, audio_path: Path, cached: Dict) -> Dict:
+        """
+        キャッシュした分析結果からJSONとStem音声を出力し、Music-Dissector形式に変換
+        
+        Args:
+            audio_path: 音声ファイルのパス
+            cached: _load_cacheで読み込んだキャッシュ
             
-            logger.info(f"✅ JSON保存完了: {json_output_path}")
+        Returns:
+            分析結果の辞書
+        """
+        logger.info(f"♻️  分析済みの音声です（キャッシュを使用）: {audio_path.name}")
+        
+        # 別の名前で分析済みの場合は、そのStem音声をこのファイルの出力先にコピー
+        stems_dir = Path(cached["stems_dir"])
+        stem_output_dir = (self.output_dir / audio_path.stem / "stems").absolute()
+        if stems_dir != stem_output_dir:
+            try:
+                shutil.rmtree(stem_output_dir)
+            except FileNotFoundError:
+                pass
+            shutil.copytree(stems_dir, stem_output_dir)
+        
+        # allin1の分析結果と同じ属性を持つオブジェクトに戻す
+        analysis = cached["analysis"]
+        result = SimpleNamespace(
+            bpm=analysis["bpm"],
+            beats=analysis["beats"],
+            downbeats=analysis["downbeats"],
+            beat_positions=analysis["beat_positions"],
+            segments=[SimpleNamespace(**seg) for seg in analysis["segments"]]
+        )
+        return self._save_outputs(audio_path, result)
+    
+    def _run_allin1(self, paths):
+        """
+        allin1.analyzeを実行（音源分離ファイルは保持する）
+        
+        マルチプロセスでの実行自体に失敗した場合（MULTIPROCESS_ERRORS、
+        またはerrnoがMULTIPROCESS_ERRNOSのOSError）だけ、
+        multiprocess=Falseで1回だけやり直す。音声ファイルの不備や音源分離の失敗、
+        GPUのメモリ不足などはやり直しても同じなので、そのまま呼び出し元に送出する
+        
+        Args:
+            paths: 音声ファイルのパス、またはそのリスト
             
-            # Stem音声の移動・整理
-            htdemucs_dir = temp_demix_dir / "htdemucs" / audio_path.stem
-            stem_output_dir = track_dir / "stems"
+        Returns:
+            allin1.analyzeの分析結果
+        """
+        # allin1はtorchやdemucsを読み込み起動が重いので、キャッシュで済む場合や
+        # 並列実行の親プロセスでは読み込まないよう、実際に分析するときにインポートする
+        from allin1 import analyze
+        
+        options = dict(
+            demix_dir=self.temp_demix_dir,
+            keep_byproducts=True,  # 音源分離ファイルを保持
+            device=self.device
+        )
+        if not self.multiprocess:
+            return analyze(paths, multiprocess=False, **options)
+        
+        try:
+            return analyze(paths, multiprocess=True, **options)
+        except MULTIPROCESS_ERRORS + (OSError,) as e:
+            if isinstance(e, OSError) and e.errno not in MULTIPROCESS_ERRNOS:
+                # 入力ファイルが無い場合などはマルチプロセスとは関係ない
+                raise
+            logger.warning(f"⚠️  マルチプロセスでの分析に失敗しました: {e}（multiprocess=Falseで再実行します）")
+            return analyze(paths, multiprocess=False, **options)
+    
+    def _save_outputs(self, audio_path: Path, result) -> Dict:
+        """
+        allin1の分析結果からJSONとStem音声を出力し、Music-Dissector形式に変換
+        
+        Args:
+            audio_path: 音声ファイルのパス
+            result: allin1.analyzeの分析結果
             
-            if htdemucs_dir.exists():
-                # 正しい場所に移動
-                if stem_output_dir.exists():
-                    import shutil
-                    shutil.rmtree(stem_output_dir)
-                htdemucs_dir.rename(stem_output_dir)
-                
-                # 一時ディレクトリを削除
-                htdemucs_parent = temp_demix_dir / "htdemucs"
-                if htdemucs_parent.exists() and not any(htdemucs_parent.iterdir()):
-                    htdemucs_parent.rmdir()
-                if temp_demix_dir.exists() and not any(temp_demix_dir.iterdir()):
-                    temp_demix_dir.rmdir()
-                
-                logger.info(f"✅ Stem音声保存完了: {stem_output_dir}")
-                
-                # 保存されたStemファイルを確認
-                for stem_file in stem_output_dir.glob("*.wav"):
-                    logger.info(f"  - {stem_file.name}")
-            
-            # サマリー表示
-            logger.info(f"\n📊 分析結果サマリー:")
-            logger.info(f"  BPM: {result.bpm}")
-            logger.info(f"  ビート数: {len(result.beats)}")
-            logger.info(f"  ダウンビート数: {len(result.downbeats)}")
-            logger.info(f"  セグメント数: {len(result.segments)}")
-            
-            # セグメント情報
-            logger.info(f"\n🎼 セグメント構成:")
-            for seg in result.segments:
-                duration = seg.end - seg.start
-                logger.info(f"  {seg.label}: {seg.start:.1f}s - {seg.end:.1f}s ({duration:.1f}s)")
-            
-            # Music-Dissector形式への変換
-            logger.info(f"\n🔄 Music-Dissector形式への変換開始...")
+        Returns:
+            分析結果の辞書
+        """
+        # 曲名ディレクトリを作成
+        track_dir = self.output_dir / audio_path.stem
+        track_dir.mkdir(parents=True, exist_ok=True)
+        
+        temp_demix_dir = self.temp_demix_dir
+        
+        # 分析結果を辞書形式に変換
+        analysis_data = {
+            "file_name": audio_path.name,
+            "file_path": str(audio_path.absolute()),
+            "bpm": result.bpm,
+            "beats": result.beats,
+            "downbeats": result.downbeats,
+            "beat_positions": result.beat_positions,
+            "segments": [
+                {
+                    "start": seg.start,
+                    "end": seg.end,
+                    "label": seg.label
+                }
+                for seg in result.segments
+            ]
+        }
+        
+        # JSONファイルとして保存（orjsonがあればC実装で書き出す）
+        json_output_path = track_dir / f"{audio_path.stem}.json"
+        if orjson is not None:
+            # allin1のセグメントの時刻はnp.float64なので、NumPyの値もシリアライズできるようにする
+            json_output_path.write_bytes(
+                orjson.dumps(analysis_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY)
+            )
+        else:
+            with open(json_output_path, 'w', encoding='utf-8') as f:
+                json.dump(analysis_data, f, indent=2, ensure_ascii=False)
+        
+        logger.info(f"✅ JSON保存完了: {json_output_path}")
+        
+        # Stem音声の移動・整理
+        htdemucs_dir = temp_demix_dir / "htdemucs" / audio_path.stem
+        stem_output_dir = track_dir / "stems"
+        
+        if htdemucs_dir.exists():
+            # 正しい場所に移動
             try:
-                music_dissector_path = convert_to_music_dissector(json_output_path)
-                logger.info(f"✅ Music-Dissector形式への変換完了")
-            except Exception as e:
-                logger.error(f"❌ Music-Dissector形式への変換エラー: {e}")
-                import traceback
-                traceback.print_exc()
+                shutil.rmtree(stem_output_dir)
+            except FileNotFoundError:
+                pass
+            htdemucs_dir.rename(stem_output_dir)
             
-            return analysis_data
+            # 一時ディレクトリを削除（rmdirは空のディレクトリしか消さないので、
+            # 存在や中身を事前に調べずに試し、消せなければそのまま残す）
+            for temp_dir in (temp_demix_dir / "htdemucs", temp_demix_dir):
+                try:
+                    temp_dir.rmdir()
+                except OSError:
+                    pass
+            
+            logger.info(f"✅ Stem音声保存完了: {stem_output_dir}")
             
+            # 保存されたStemファイルを確認
+            for stem_file in stem_output_dir.glob("*.wav"):
+                logger.info(f"  - {stem_file.name}")
+        
+        # サマリー表示
+        logger.info(f"\n📊 分析結果サマリー:")
+        logger.info(f"  BPM: {result.bpm}")
+        logger.info(f"  ビート数: {len(result.beats)}")
+        logger.info(f"  ダウンビート数: {len(result.downbeats)}")
+        logger.info(f"  セグメント数: {len(result.segments)}")
+        
+        # セグメント情報（1行ずつログを出さず、まとめて1回で出力する）
+        segment_lines = [
+            f"  {seg.label}: {seg.start:.1f}s - {seg.end:.1f}s ({seg.end - seg.start:.1f}s)"
+            for seg in result.segments
+        ]
+        logger.info("\n".join([f"\n🎼 セグメント構成:", *segment_lines]))
+        
+        # Music-Dissector形式への変換
+        logger.info(f"\n🔄 Music-Dissector形式への変換開始...")
+        try:
+            music_dissector_path = convert_to_music_dissector(json_output_path)
+            logger.info(f"✅ Music-Dissector形式への変換完了")
         except Exception as e:
-            logger.error(f"❌ 分析エラー: {e}")
+            logger.error(f"❌ Music-Dissector形式への変換エラー: {e}")
             import traceback
             traceback.print_exc()
-            return None
+        
+        return analysis_data
     
-    def batch_analyze(self, audio_files: list) -> list:
+    def batch_analyze(self, audio_files: list, workers: int = 1) -> list:
         """
         複数の音声ファイルを一括分析
         
+        allin1.analyzeにまとめて渡すことで、音源分離（demucs）の起動とモデルの読み込みを
+        ファイルごとではなく1回で済ませる
+        
         Args:
             audio_files: 音声ファイルパスのリスト
+            workers: 並列に分析するプロセス数（2以上でファイルを分割して別プロセスで分析）
             
         Returns:
             分析結果のリスト
         """
-        results = []
+        results = list(self.batch_analyze_iter(audio_files, workers))
+        logger.info(f"\n✅ 一括分析完了: {len(results)}/{len(audio_files)} ファイル成功")
+        return results
+    
+    def batch_analyze_iter(self, audio_files: list, workers: int = 1) -> Iterator[Dict]:
+        """
+        複数の音声ファイルを一括分析し、出力が終わったファイルから順に分析結果を返す
+        
+        batch_analyzeと同じ処理を行うが、結果をリストにためないので
+        呼び出し側で1件ずつ処理すれば全ファイル分の結果をメモリに持たずに済む
+        
+        Args:
+            audio_files: 音声ファイルパスのリスト
+            workers: 並列に分析するプロセス数（2以上でファイルを分割して別プロセスで分析）
+            
+        Yields:
+            分析結果の辞書（audio_filesの順、失敗したファイルは飛ばす）
+        """
         total = len(audio_files)
+        audio_paths = []
+        for audio_file in audio_files:
+            audio_path = Path(audio_file)
+            if audio_path.exists():
+                audio_paths.append(audio_path)
+            else:
+                logger.error(f"❌ ファイルが見つかりません: {audio_path}")
+        
+        # 同じファイル名（拡張子なし）があると音源分離の出力先が衝突するので、1ファイルずつ分析する
+        if len({audio_path.stem for audio_path in audio_paths}) != len(audio_paths):
+            yield from self._batch_analyze_sequential(audio_paths, total)
+            return
+        
+        if not audio_paths:
+            return
+        
+        if workers > 1 and len(audio_paths) > 1:
+            yield from self._batch_analyze_parallel(audio_paths, workers)
+            return
+        
+        # このインスタンスで分析済みのファイルはメモから返し、同じ内容の音声を分析済みのファイルは
+        # キャッシュから出力して、残りだけをallin1で分析する
+        memo_keys = {audio_path: self._memo_key(audio_path) for audio_path in audio_paths}
+        memo_by_path = {
+            audio_path: self._memo[memo_key]
+            for audio_path, memo_key in memo_keys.items()
+            if memo_key in self._memo
+        }
+        digests = {
+            audio_path: self._content_hash(audio_path)
+            for audio_path in audio_paths
+            if audio_path not in memo_by_path
+        }
+        cached_by_path = {}
+        for audio_path, digest in digests.items():
+            cached = self._load_cache(digest)
+            if cached is not None:
+                cached_by_path[audio_path] = cached
+        todo_paths = [audio_path for audio_path in digests if audio_path not in cached_by_path]
+        
+        results_by_path = {}
+        if todo_paths:
+            logger.info(f"🎵 一括分析開始: {len(todo_paths)} ファイル")
+            try:
+                analyzed = self._run_allin1(todo_paths)
+            except Exception as e:
+                # まとめての分析に失敗した場合は、原因のファイルだけを失敗にするため1ファイルずつ分析し直す
+                logger.error(f"❌ 一括分析エラー: {e}（1ファイルずつ分析し直します）")
+                yield from self._batch_analyze_sequential(audio_paths, total)
+                return
+            
+            # allin1は結果をパス順に並べ替えて返すので、パスで元の順序に対応付ける
+            results_by_path = {result.path: result for result in analyzed}
         
-        for i, audio_file in enumerate(audio_files, 1):
+        for i, audio_path in enumerate(audio_paths, 1):
             logger.info(f"\n{'='*50}")
-            logger.info(f"📁 処理中 ({i}/{total}): {Path(audio_file).name}")
+            logger.info(f"📁 出力中 ({i}/{total}): {audio_path.name}")
             logger.info(f"{'='*50}")
             
-            result = self.analyze(audio_file)
+            try:
+                if audio_path in memo_by_path:
+                    logger.info(f"♻️  分析済みです: {audio_path.name}")
+                    analysis_data = memo_by_path[audio_path]
+                elif audio_path in cached_by_path:
+                    analysis_data = self._save_cached_outputs(audio_path, cached_by_path[audio_path])
+                    self._remember(memo_keys[audio_path], analysis_data)
+                else:
+                    result = results_by_path[audio_path.expanduser().resolve()]
+                    analysis_data = self._save_outputs(audio_path, result)
+                    self._store_cache(digests[audio_path], audio_path, analysis_data)
+                    self._remember(memo_keys[audio_path], analysis_data)
+            except Exception as e:
+                logger.error(f"❌ 分析エラー: {e}")
+                import traceback
+                traceback.print_exc()
+                continue
+            yield analysis_data
+    
+    def _batch_analyze_parallel(self, audio_paths: list, workers: int) -> Iterator[Dict]:
+        """
+        音声ファイルをworkers個に分割し、それぞれ別プロセスでbatch_analyzeする
+        
+        Args:
+            audio_paths: 存在する音声ファイルパスのリスト（ファイル名の重複なし）
+            workers: プロセス数
+            
+        Yields:
+            分析結果の辞書（audio_pathsの順。担当プロセスが終わったファイルから返す）
+        """
+        workers = min(workers, len(audio_paths))
+        shards = [audio_paths[i::workers] for i in range(workers)]
+        # PyTorchのスレッドがプロセス間で取り合わないよう、CPUコアをプロセス数で分ける
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        
+        # GPUが複数ある場合は、プロセスごとに別のGPUを割り当てる
+        devices = [self.device] * workers
+        if self.device == "cuda":
+            import torch
+            gpu_count = torch.cuda.device_count()
+            if gpu_count > 1:
+                devices = [f"cuda:{index % gpu_count}" for index in range(workers)]
+        
+        logger.info(f"🎵 一括分析開始: {len(audio_paths)} ファイル（{workers} プロセス）")
+        # PyTorchの状態をforkで引き継がないようspawnで起動する
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(
+                    _analyze_shard, str(self.output_dir), index, shard, threads, devices[index], self.multiprocess
+                )
+                for index, shard in enumerate(shards)
+            ]
+            # i番目のファイルはi % workers番目のプロセスが担当しているので、
+            # そのプロセスの結果が届いた時点で順に返す
+            shard_results = {}
+            for i, audio_path in enumerate(audio_paths):
+                index = i % workers
+                if index not in shard_results:
+                    try:
+                        shard_results[index] = {
+                            result["file_path"]: result for result in futures[index].result()
+                        }
+                    except Exception as e:
+                        logger.error(f"❌ 分析エラー: {e}")
+                        shard_results[index] = {}
+                result = shard_results[index].get(str(audio_path.absolute()))
+                if result is not None:
+                    yield result
+    
+    def _batch_analyze_sequential(self, audio_paths: list, total: int) -> Iterator[Dict]:
+        """
+        音声ファイルを1つずつ分析する（batch_analyzeのフォールバック）
+        
+        Args:
+            audio_paths: 存在する音声ファイルパスのリスト
+            total: 指定されたファイル数（ログ表示用）
+            
+        Yields:
+            分析結果の辞書
+        """
+        for i, audio_path in enumerate(audio_paths, 1):
+            logger.info(f"\n{'='*50}")
+            logger.info(f"📁 処理中 ({i}/{total}): {audio_path.name}")
+            logger.info(f"{'='*50}")
+            
+            result = self.analyze(audio_path)
             if result:
-                results.append(result)
+                yield result
+
+def _analyze_shard(
+    output_dir: str, index: int, audio_paths: list, threads: int, device: str, multiprocess: bool
+) -> list:
+    """
+    batch_analyzeの並列実行用に、子プロセスで担当分のファイルを一括分析する
+    
+    Args:
+        output_dir: 出力ディレクトリ
+        index: 担当分の番号（音源分離の一時ディレクトリを分けるのに使う）
+        audio_paths: 担当する音声ファイルパスのリスト
+        threads: このプロセスでPyTorchが使うスレッド数
+        device: このプロセスでallin1を実行するデバイス
+        multiprocess: allin1をマルチプロセスで実行するか
         
-        logger.info(f"\n✅ 一括分析完了: {len(results)}/{total} ファイル成功")
-        return results
+    Returns:
+        分析結果のリスト
+    """
+    import torch
+    torch.set_num_threads(threads)
+    
+    analyzer = SimpleAnalyzer(output_dir, device=device, multiprocess=multiprocess)
+    # 他のプロセスと一時ディレクトリの作成・削除が競合しないようにする
+    analyzer.temp_demix_dir = analyzer.output_dir / f"temp_demix_{index}"
+    return analyzer.batch_analyze(audio_paths)
 
 
 def main():
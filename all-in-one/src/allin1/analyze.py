@@ -1,5 +1,7 @@
 import torch
 
+from contextlib import contextmanager
+from functools import lru_cache
 from typing import List, Union
 from tqdm import tqdm
 from .demix import demix
@@ -121,12 +123,10 @@ def analyze(
     spec_paths = extract_spectrograms(demix_paths, spec_dir, multiprocess)
 
     # Load the model.
-    model = load_pretrained_model(
-      model_name=model,
-      device=device,
-    )
+    model = _load_pretrained_model_cached(model, str(device))
 
-    with torch.no_grad():
+    # On CUDA, let the matmuls in the transformer layers use TF32 tensor cores (convolutions already do by default).
+    with torch.no_grad(), _allow_tf32_matmul(torch.device(device).type == 'cuda'):
       pbar = tqdm(zip(todo_paths, spec_paths), total=len(todo_paths))
       for path, spec_path in pbar:
         pbar.set_description(f'Analyzing {path.name}')
@@ -178,3 +178,26 @@ def analyze(
   if not return_list:
     return results[0]
   return results
+
+
+@contextmanager
+def _allow_tf32_matmul(enabled: bool):
+  if not enabled:
+    yield
+    return
+  prev = torch.backends.cuda.matmul.allow_tf32
+  torch.backends.cuda.matmul.allow_tf32 = True
+  try:
+    yield
+  finally:
+    torch.backends.cuda.matmul.allow_tf32 = prev
+
+
+@lru_cache(maxsize=2)
+def _load_pretrained_model_cached(model_name: str, device: str):
+  # Keep the loaded weights around so that repeated calls to `analyze` in the same process
+  # (e.g., analyzing files one by one) do not reload the checkpoints every time.
+  return load_pretrained_model(
+    model_name=model_name,
+    device=device,
+  )
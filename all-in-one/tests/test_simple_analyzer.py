@@ -0,0 +1,99 @@
+import json
+import shutil
+import sys
+import numpy as np
+import soundfile as sf
+
+from pathlib import Path
+from types import SimpleNamespace
+
+CWD = Path(__file__).resolve().parent
+sys.path.insert(0, str(CWD.parent))
+
+from simple_analyzer import SimpleAnalyzer, STEM_NAMES
+
+SR = 22050
+
+
+def _write_audio(path, freq):
+  t = np.arange(SR) / SR
+  sf.write(path, (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32), SR)
+
+
+def _fake_allin1(analyzer, calls, float_type=float):
+  # Stand-in for allin1: the stems and beats depend on the audio content.
+  # Pass float_type=np.float64 to return segment times the way allin1's postprocessing does.
+  def run(path):
+    calls.append(path.name)
+    y, sr = sf.read(path, dtype='float32')
+    out_dir = analyzer.temp_demix_dir / 'htdemucs' / path.stem
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for stem in STEM_NAMES:
+      sf.write(out_dir / f'{stem}.wav', y, sr)
+    beat = float(np.argmax(np.abs(np.fft.rfft(y))))
+    return SimpleNamespace(
+      bpm=120,
+      beats=[beat],
+      downbeats=[beat],
+      beat_positions=[1],
+      segments=[SimpleNamespace(start=float_type(0.0), end=float_type(1.0), label='intro')],
+    )
+  return run
+
+
+def test_cache_hit_for_renamed_copy(tmp_path):
+  analyzer = SimpleAnalyzer(tmp_path / 'output', multiprocess=False)
+  calls = []
+  analyzer._run_allin1 = _fake_allin1(analyzer, calls)
+
+  _write_audio(tmp_path / 'song.wav', 220)
+  first = analyzer.analyze(tmp_path / 'song.wav')
+  shutil.copyfile(tmp_path / 'song.wav', tmp_path / 'copy.wav')
+  second = analyzer.analyze(tmp_path / 'copy.wav')
+
+  assert calls == ['song.wav']
+  assert second['beats'] == first['beats']
+  assert (analyzer.output_dir / 'copy' / 'stems' / 'bass.wav').read_bytes() == \
+         (analyzer.output_dir / 'song' / 'stems' / 'bass.wav').read_bytes()
+
+
+def test_cache_miss_after_stems_are_overwritten(tmp_path):
+  analyzer = SimpleAnalyzer(tmp_path / 'output', multiprocess=False)
+  calls = []
+  analyzer._run_allin1 = _fake_allin1(analyzer, calls)
+
+  # Analyze content X, keep a copy of it, then replace song.wav with content Y.
+  # Analyzing Y overwrites output/song/stems, which X's cache entry points at.
+  _write_audio(tmp_path / 'song.wav', 220)
+  x = analyzer.analyze(tmp_path / 'song.wav')
+  shutil.copyfile(tmp_path / 'song.wav', tmp_path / 'x_copy.wav')
+  x_stem = (analyzer.output_dir / 'song' / 'stems' / 'bass.wav').read_bytes()
+  _write_audio(tmp_path / 'song.wav', 440)
+  y = analyzer.analyze(tmp_path / 'song.wav')
+  assert y['beats'] != x['beats']
+
+  # The copy of X must not be served X's beats together with Y's stems.
+  result = analyzer.analyze(tmp_path / 'x_copy.wav')
+
+  assert calls == ['song.wav', 'song.wav', 'x_copy.wav']
+  assert result['beats'] == x['beats']
+  assert (analyzer.output_dir / 'x_copy' / 'stems' / 'bass.wav').read_bytes() == x_stem
+
+
+def test_numpy_segment_times(tmp_path):
+  analyzer = SimpleAnalyzer(tmp_path / 'output', multiprocess=False)
+  calls = []
+  analyzer._run_allin1 = _fake_allin1(analyzer, calls, float_type=np.float64)
+
+  _write_audio(tmp_path / 'song.wav', 220)
+  result = analyzer.analyze(tmp_path / 'song.wav')
+
+  assert result is not None
+  saved = json.loads((analyzer.output_dir / 'song' / 'song.json').read_text(encoding='utf-8'))
+  assert saved['segments'] == [{'start': 0.0, 'end': 1.0, 'label': 'intro'}]
+
+  # The cache entry must have been written too, so a renamed copy is served from it.
+  shutil.copyfile(tmp_path / 'song.wav', tmp_path / 'copy.wav')
+  copy = analyzer.analyze(tmp_path / 'copy.wav')
+  assert calls == ['song.wav']
+  assert copy['segments'] == saved['segments']
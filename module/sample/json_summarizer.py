@@ -6,11 +6,27 @@ JSONファイルの内容を俯瞰的に確認するためのサマライザー
 """
 
 import json
+import mmap
 import os
 import sys
 from typing import Any, Dict, List, Union
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    # orjsonが無い環境では標準のjsonを使う
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    # ijsonが無い環境では常にファイル全体を読み込んでからサマライズする
+    ijson = None
+
+# このサイズ以上のファイルはijsonでストリーム解析し、全体をメモリに載せない
+STREAM_THRESHOLD_BYTES = 64 * 1024 * 1024
+
 
 def summarize_value(value: Any, max_items: int = 10) -> Any:
     """
@@ -18,39 +34,162 @@ def summarize_value(value: Any, max_items: int = 10) -> Any:
     - リストの場合: 最初のmax_items個まで取得
     - 辞書の場合: 再帰的にサマライズ
     - その他: そのまま返す
+    
+    深いJSONでも再帰呼び出しの上限に当たらないよう、明示的なスタックで辿る
+    （JSONから読み込んだ値しか来ないので、型判定はisinstanceではなくtype() isで行う）
+    """
+    root = {}
+    # (結果を書き込むコンテナ, キー, サマライズする値)
+    stack = [(root, "value", value)]
+    while stack:
+        parent, key, value = stack.pop()
+        value_type = type(value)
+        
+        if value_type is list:
+            # リストの場合、最初のmax_items個まで取得
+            sample = value[:max_items]
+            result = {
+                "_type": "list",
+                "_total_count": len(value),
+                "_sample_count": len(sample),
+                "_samples": sample
+            }
+            
+            # リストの要素が辞書の場合、それもサマライズ
+            if sample and type(sample[0]) is dict:
+                result["_structure_sample"] = None
+                stack.append((result, "_structure_sample", sample[0]))
+            
+            parent[key] = result
+        
+        elif value_type is dict:
+            # 辞書の場合、各キーに対してサマライズ（キーの順序は先に確定させておく）
+            result = dict.fromkeys(value)
+            stack.extend([(result, k, v) for k, v in value.items()])
+            parent[key] = result
+        
+        else:
+            # プリミティブ型の場合はそのまま返す
+            parent[key] = value
+    
+    return root["value"]
+
+
+def _build_value(events, event: str, value: Any) -> Any:
+    """
+    ijsonのイベント列から値を1つ丸ごと組み立てる（サンプルとして残す要素用）
+    """
+    if event == 'start_map':
+        result = {}
+        for _, event, value in events:
+            if event == 'end_map':
+                return result
+            # event == 'map_key'
+            _, event, item = next(events)
+            result[value] = _build_value(events, event, item)
+    elif event == 'start_array':
+        result = []
+        for _, event, value in events:
+            if event == 'end_array':
+                return result
+            result.append(_build_value(events, event, value))
+    return value
+
+
+def _skip_value(events, event: str) -> None:
+    """
+    ijsonのイベント列から値を1つ読み飛ばす（サンプルに含めない要素用）
     """
-    if isinstance(value, list):
-        # リストの場合、最初のmax_items個まで取得
-        sample = value[:max_items]
+    if event not in ('start_map', 'start_array'):
+        return
+    depth = 1
+    for _, event, _ in events:
+        if event in ('start_map', 'start_array'):
+            depth += 1
+        elif event in ('end_map', 'end_array'):
+            depth -= 1
+            if depth == 0:
+                return
+
+
+def _summarize_events(events, event: str, value: Any, max_items: int) -> Any:
+    """
+    ijsonのイベント列を読みながらsummarize_valueと同じサマリーを作成する
+    
+    配列は先頭max_items個だけを組み立て、残りは件数を数えながら読み飛ばす
+    """
+    if event == 'start_map':
+        result = {}
+        for _, event, value in events:
+            if event == 'end_map':
+                return result
+            # event == 'map_key'
+            _, event, item = next(events)
+            result[value] = _summarize_events(events, event, item, max_items)
+    elif event == 'start_array':
+        sample = []
+        total_count = 0
+        for _, event, value in events:
+            if event == 'end_array':
+                break
+            total_count += 1
+            if len(sample) < max_items:
+                sample.append(_build_value(events, event, value))
+            else:
+                _skip_value(events, event)
         result = {
             "_type": "list",
-            "_total_count": len(value),
+            "_total_count": total_count,
             "_sample_count": len(sample),
             "_samples": sample
         }
-        
-        # リストの要素が辞書の場合、それもサマライズ
-        if sample and isinstance(sample[0], dict):
+        if sample and type(sample[0]) is dict:
             result["_structure_sample"] = summarize_value(sample[0], max_items)
-            
         return result
-        
-    elif isinstance(value, dict):
-        # 辞書の場合、各キーに対して再帰的にサマライズ
-        result = {}
-        for key, val in value.items():
-            result[key] = summarize_value(val, max_items)
-        return result
-        
-    else:
-        # プリミティブ型の場合はそのまま返す
-        return value
+    return value
+
+
+def summarize_stream(f, max_items: int = 10) -> Any:
+    """
+    バイナリモードで開いたJSONファイルをijsonでストリーム解析してサマライズする
+    
+    ファイル全体を読み込まないので、メモリ使用量はサンプルとネストの深さ分だけで済む
+    """
+    events = ijson.parse(f, use_float=True)
+    _, event, value = next(events)
+    result = _summarize_events(events, event, value, max_items)
+    # 末尾の不正なデータも検出するため、イベントを最後まで消費する
+    for _ in events:
+        pass
+    return result
+
+
+def _load_json_mmap(input_path: Path) -> Any:
+    """
+    ファイルを読み取り専用でmmapし、そのバッファを直接orjsonで解析する
+    
+    ファイル全体をbytesとしてPythonのヒープにコピーせずに済む
+    """
+    with open(input_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # 空ファイルはmmapできないので、そのまま解析させてエラーにする
+            return orjson.loads(b"")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as buf:
+                return orjson.loads(buf)
 
 
 def create_summary(data: Dict[str, Any], max_items: int = 10) -> Dict[str, Any]:
     """
     JSONデータ全体のサマリーを作成
     """
+    return _wrap_summary(summarize_value(data, max_items), max_items)
+
+
+def _wrap_summary(summarized: Any, max_items: int) -> Dict[str, Any]:
+    """
+    サマライズ済みの値にメタデータを付けてサマリー全体を組み立てる
+    """
     summary = {
         "_metadata": {
             "description": "JSONファイルのサマリー（各配列は最初の10個まで）",
@@ -63,7 +202,7 @@ def create_summary(data: Dict[str, Any], max_items: int = 10) -> Dict[str, Any]:
                 "_structure_sample": "配列要素が辞書の場合の構造サンプル"
             }
         },
-        "summary": summarize_value(data, max_items)
+        "summary": summarized
     }
     
     return summary
@@ -94,20 +233,40 @@ def process_json_file(input_path: str, output_dir: str = None) -> str:
     print(f"処理中: {input_path}")
     print(f"ファイルサイズ: {input_path.stat().st_size / 1024 / 1024:.2f} MB")
     
-    # JSONファイルの読み込み
-    try:
-        with open(input_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-    except json.JSONDecodeError as e:
-        raise ValueError(f"JSONの解析に失敗しました: {e}")
-    
-    # サマリーの作成
-    print("サマリーを作成中...")
-    summary = create_summary(data)
+    # 大きなファイル（またはorjsonが無い場合）はijsonでストリーム解析し、
+    # 配列の先頭max_items個以外は組み立てずに読み飛ばす
+    file_size = input_path.stat().st_size
+    if ijson is not None and (orjson is None or file_size >= STREAM_THRESHOLD_BYTES):
+        print("サマリーを作成中（ストリーム解析）...")
+        try:
+            with open(input_path, 'rb') as f:
+                summary = _wrap_summary(summarize_stream(f), 10)
+        except (ijson.JSONError, StopIteration) as e:
+            raise ValueError(f"JSONの解析に失敗しました: {e}")
+    else:
+        # JSONファイルの読み込み（orjsonがあればmmapしたバッファをC実装で解析する）
+        try:
+            if orjson is not None:
+                data = _load_json_mmap(input_path)
+            else:
+                with open(input_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+        except json.JSONDecodeError as e:
+            # orjson.JSONDecodeErrorもjson.JSONDecodeErrorのサブクラス
+            raise ValueError(f"JSONの解析に失敗しました: {e}")
+        
+        # サマリーの作成
+        print("サマリーを作成中...")
+        summary = create_summary(data)
     
     # サマリーの保存
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2)
+    if orjson is not None:
+        output_path.write_bytes(
+            orjson.dumps(summary, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        )
+    else:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
     
     print(f"サマリーを保存しました: {output_path}")
     print(f"出力ファイルサイズ: {output_path.stat().st_size / 1024:.2f} KB")
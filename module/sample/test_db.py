@@ -5,6 +5,7 @@ from mysql.connector import pooling
 import time
 import os
 import json
+from collections import namedtuple
 from dotenv import load_dotenv
 
 # .envファイルから環境変数を読み込む
@@ -41,31 +42,47 @@ def get_db_config():
         "port": 3306,
         "autocommit": True,
         "pool_name": "mypool",
-        "pool_size": 1
+        "pool_size": 10
     }
 
 # データベース接続設定を取得
 DB_CONFIG = get_db_config()
 
+# 最初のレコードを取得するクエリ（呼び出しごとに組み立てない）
+FIRST_RECORD_QUERY = "SELECT id, url, content, created_at FROM html_contents ORDER BY id ASC LIMIT 1"
+
+# 取得したレコード（dictを作らず、タプルのまま名前でアクセスできるようにする）
+HtmlContent = namedtuple("HtmlContent", ["id", "url", "content", "created_at"])
+
+
+_pool = None
+
 
 def get_connection_pool():
-    """コネクションプールを作成"""
+    """コネクションプールを作成（プロセス内で1回だけ作成し、以降は使い回す）"""
+    global _pool
+    if _pool is not None:
+        return _pool
     try:
-        pool = pooling.MySQLConnectionPool(**DB_CONFIG)
-        return pool
+        _pool = pooling.MySQLConnectionPool(**DB_CONFIG)
+        return _pool
     except mysql.connector.Error as e:
         print(f"コネクションプールの作成に失敗しました: {e}")
         raise
 
-def fetch_first_record(pool):
+def fetch_first_record(pool=None):
     """最初のレコードを取得"""
-    query = "SELECT id, url, content, created_at FROM html_contents ORDER BY id ASC LIMIT 1"
+    if pool is None:
+        pool = get_connection_pool()
+    connection = None
+    cursor = None
     try:
         connection = pool.get_connection()
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute(query)
-        result = cursor.fetchone()
-        return result
+        # 1行取るだけなのでdictionaryカーソルは使わず、タプルをnamedtupleに詰める
+        cursor = connection.cursor()
+        cursor.execute(FIRST_RECORD_QUERY)
+        row = cursor.fetchone()
+        return HtmlContent(*row) if row else None
     except mysql.connector.Error as e:
         print(f"レコードの取得に失敗しました: {e}")
         return None
@@ -82,10 +99,10 @@ if __name__ == "__main__":
     elapsed_time = time.time() - start_time
     if first_record:
         print("最初のレコード:")
-        print(f"ID: {first_record['id']}")
-        print(f"URL: {first_record['url']}")
-        print(f"Content: {first_record['content'][:100]}...")  # コンテンツの最初の100文字のみ表示
-        print(f"Created At: {first_record['created_at']}")
+        print(f"ID: {first_record.id}")
+        print(f"URL: {first_record.url}")
+        print(f"Content: {first_record.content[:100]}...")  # コンテンツの最初の100文字のみ表示
+        print(f"Created At: {first_record.created_at}")
     else:
         print("レコードが見つかりませんでした。")
     print(f"処理時間: {elapsed_time:.2f} 秒")
@@ -101,6 +101,39 @@ async def fetch_first_record(pool):
             result = await cursor.fetchone()
             return result
 
+async def fetch_many(pool, query, params_list):
+    """
+    同じクエリを複数のパラメータで並行して実行し、それぞれの結果行を返す
+    
+    同時実行数はプールの最大接続数までに抑え、接続待ちでタイムアウトしないようにする
+    """
+    semaphore = asyncio.Semaphore(pool.maxsize)
+    
+    async def fetch_one(params):
+        async with semaphore:
+            async with pool.acquire() as connection:
+                async with connection.cursor(aiomysql.DictCursor) as cursor:
+                    await cursor.execute(query, params)
+                    return await cursor.fetchall()
+    
+    return await asyncio.gather(*(fetch_one(params) for params in params_list))
+
+async def stream_records(pool, query, params=None, size=1000):
+    """
+    サーバーサイドカーソルで結果を少しずつ取得しながら1行ずつ返す
+    
+    fetchallのように結果全体をメモリに載せないので、行数の多いSELECTに使う
+    """
+    async with pool.acquire() as connection:
+        async with connection.cursor(aiomysql.SSDictCursor) as cursor:
+            await cursor.execute(query, params)
+            while True:
+                rows = await cursor.fetchmany(size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row
+
 async def main():
     pool = await get_connection_pool()
     first_record = await fetch_first_record(pool)
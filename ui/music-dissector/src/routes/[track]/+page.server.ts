@@ -3,6 +3,17 @@ import { readFile } from 'fs/promises'
 import { join } from 'path'
 import { gunzipSync } from 'zlib'
 
+// --binary-bandsで変換したデータは帯域ごとのuint8配列がbase64文字列になっているので数値配列に戻す
+function decodeBands(bands) {
+  for (const stem of Object.values(bands ?? {})) {
+    for (const [band, value] of Object.entries(stem)) {
+      if (typeof value === 'string') {
+        stem[band] = Array.from(Buffer.from(value, 'base64'))
+      }
+    }
+  }
+}
+
 export async function load({ params }) {
   const { track } = params
   
@@ -24,6 +35,9 @@ export async function load({ params }) {
       data = JSON.parse(jsonContent)
     }
     
+    decodeBands(data.nav)
+    decodeBands(data.wav)
+    
     // 音声ファイルのURLを追加
     return {
       ...data,